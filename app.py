@@ -3,8 +3,9 @@ import os
 import threading
 from datetime import date
 
-from flask import Flask, render_template, request, jsonify, redirect, url_for
+from flask import Flask, render_template, request, jsonify, redirect, url_for, abort, Response
 from apscheduler.schedulers.background import BackgroundScheduler
+from werkzeug.middleware.proxy_fix import ProxyFix
 import requests
 
 from models import (
@@ -13,23 +14,37 @@ from models import (
     get_schedule_grouped_by_weekday,
     get_stadtteile_with_schedule,
     get_siedlungsabfuhr_entries,
+    upsert_address_lookup,
     next_dates_for_weekday,
     next_dates_for_fixed_date,
     FRANKFURTER_STADTTEILE,
     WEEKDAY_NAMES,
 )
-from fes_scraper import scrape_all, fetch_available_dates, fetch_street_suggestions, fetch_housenumbers
-from config import SCRAPE_INTERVAL_HOURS, FES_BOOKING_PAGE_URL
+from fes_scraper import scrape_all, refresh_address_lookups, fetch_available_dates, fetch_street_suggestions, fetch_housenumbers
+from ical import get_stadtteil_feed, get_address_feed, refresh_feeds
+from config import SCRAPE_INTERVAL_HOURS, FES_BOOKING_PAGE_URL, ICAL_MAX_AGE_SECONDS
 
 app = Flask(__name__)
+# Hinter dem Fly-Proxy (force_https): externe URLs (Kalender-Abo) mit https erzeugen
+app.wsgi_app = ProxyFix(app.wsgi_app, x_proto=1, x_host=1)
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+
+def scrape_and_refresh_feeds():
+    """Scheduler-Job: Stadtteile und gespeicherte Adressen aktualisieren, danach iCal-Feeds erzeugen."""
+    scrape_all()
+    refresh_address_lookups()
+    refresh_feeds()
+
+
 # DB und Scheduler auch unter Gunicorn starten (nicht nur bei python app.py)
 init_db()
-threading.Thread(target=scrape_all, daemon=True).start()
+threading.Thread(target=scrape_and_refresh_feeds, daemon=True).start()
 _scheduler = BackgroundScheduler()
-_scheduler.add_job(scrape_all, "interval", hours=SCRAPE_INTERVAL_HOURS)
+_scheduler.add_job(scrape_and_refresh_feeds, "interval", hours=SCRAPE_INTERVAL_HOURS)
+# Termine verschieben sich täglich – Feeds kurz nach Mitternacht neu erzeugen
+_scheduler.add_job(refresh_feeds, "cron", hour=0, minute=5)
 _scheduler.start()
 
 
@@ -44,6 +59,12 @@ def short_date_filter(date_str):
     return f"{d.day}.{d.month:02d}.{d.year}"
 
 
+@app.template_filter("webcal")
+def webcal_filter(url):
+    """Absolute Feed-URL als webcal://-Link, damit Kalender-Apps sie abonnieren statt einmalig importieren."""
+    return "webcal://" + url.split("://", 1)[1]
+
+
 @app.context_processor
 def inject_globals():
     return {
@@ -112,6 +133,16 @@ def index():
                 "error": "Ein Fehler ist aufgetreten. Bitte Schreibweise der Straße prüfen (z.B. „Str.“ statt „Strasse“) und es erneut versuchen.",
             }
 
+    if lookup_result and lookup_result["success"]:
+        # Lokaler Cache für den Adress-Kalender – darf das Suchergebnis nicht gefährden
+        try:
+            upsert_address_lookup(
+                street, housenumber,
+                lookup_result["weekday"], lookup_result["fixed_date"], lookup_result["zip_code"],
+            )
+        except Exception:
+            logger.exception("Adress-Suche konnte nicht gespeichert werden")
+
     by_weekday = get_schedule_grouped_by_weekday()
     stadtteile_with_data = get_stadtteile_with_schedule()
     siedlungsabfuhr = get_siedlungsabfuhr_entries()
@@ -171,6 +202,38 @@ def termine():
     )
 
 
+def _ical_response(feed, filename):
+    """Feed mit ETag ausliefern; bei passendem If-None-Match antwortet Werkzeug mit 304."""
+    body, etag = feed
+    response = Response(body, mimetype="text/calendar")
+    response.headers["Content-Disposition"] = f'inline; filename="{filename}"'
+    response.cache_control.public = True
+    response.cache_control.max_age = ICAL_MAX_AGE_SECONDS
+    response.set_etag(etag)
+    return response.make_conditional(request)
+
+
+@app.route("/ical/stadtteil/<stadtteil>.ics")
+def ical_stadtteil(stadtteil):
+    feed = get_stadtteil_feed(stadtteil)
+    if feed is None:
+        abort(404)
+    return _ical_response(feed, "sperrmuell.ics")
+
+
+@app.route("/ical/address.ics")
+def ical_address():
+    """Kalender für eine Adresse – nur aus gespeicherten Suchergebnissen, ohne FES-Anfrage."""
+    street = (request.args.get("street") or "").strip()
+    housenumber = (request.args.get("housenumber") or "").strip()
+    if not street or not housenumber:
+        abort(400)
+    feed = get_address_feed(street, housenumber)
+    if feed is None:
+        abort(404)
+    return _ical_response(feed, "sperrmuell.ics")
+
+
 @app.route("/suchen", methods=["GET", "POST"], endpoint="address_lookup")
 def suchen():
     """Weiterleitung zur Startseite – Adresssuche liegt auf /."""
@@ -29,3 +29,13 @@ SCRAPE_INTERVAL_HOURS = 24
 # Bei "Zu viele Anfragen" (429): so lange warten vor erneutem Versuch
 RETRY_AFTER_429_SECONDS = 90
 MAX_RETRIES_429 = 2
+# iCalendar-Feeds: Zeitraum der Termine (vergangene Termine bleiben im Kalender) und Cache-Dauer für Kalender-Clients
+ICAL_WEEKS_BACK = 4
+ICAL_WEEKS_AHEAD = 26
+ICAL_MAX_AGE_SECONDS = 3600
+# Gespeicherte Adressen: nach so vielen Tagen ohne Feed-Abruf löschen
+ICAL_ADDRESS_RETENTION_DAYS = 30
+# Nur Adressen mit Feed-Abruf in diesem Zeitraum vorab erzeugen und bei der FES nachprüfen
+ICAL_ADDRESS_ACTIVE_DAYS = 7
+# Adress-Feeds mit älterem FES-Stand nicht mehr ausliefern (404)
+ICAL_ADDRESS_MAX_AGE_DAYS = 7
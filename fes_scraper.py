@@ -5,7 +5,7 @@ Nutzt dieselben Daten wie das Online-Formular der FES.
 import logging
 import random
 import time
-from datetime import datetime
+from datetime import date, datetime, timedelta
 
 import requests
 
@@ -15,8 +15,9 @@ from config import (
     ADDRESSES_JSON,
     RETRY_AFTER_429_SECONDS,
     MAX_RETRIES_429,
+    ICAL_ADDRESS_ACTIVE_DAYS,
 )
-from models import load_addresses, upsert_schedule, init_db
+from models import load_addresses, upsert_schedule, init_db, get_address_lookups, upsert_address_lookup
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -191,3 +192,49 @@ def scrape_all():
     )
     if failed_stadtteile:
         logger.info("Übersprungene Stadtteile (Auswahl): %s", failed_stadtteile[:15])
+
+
+def refresh_address_lookups():
+    """
+    Gespeicherte Adressen mit kürzlich abgerufenem Kalender-Feed bei der FES nachprüfen,
+    damit Adress-Feeds Änderungen von Wochentag oder Siedlungsabfuhr-Termin übernehmen.
+    Gleiche Pausen und 429-Behandlung wie scrape_all. Ohne Ergebnis bleibt der alte Stand
+    stehen und läuft nach ICAL_ADDRESS_MAX_AGE_DAYS ab.
+    """
+    polled_since = (date.today() - timedelta(days=ICAL_ADDRESS_ACTIVE_DAYS)).isoformat()
+    lookups = get_address_lookups(polled_since=polled_since)
+    ok = 0
+    for i, row in enumerate(lookups):
+        street, number = row["street"], row["housenumber"]
+        result = None
+        retries_429 = 0
+        while retries_429 <= MAX_RETRIES_429:
+            try:
+                result = fetch_available_dates(street, number)
+                break
+            except requests.HTTPError as e:
+                if e.response.status_code == 429 and retries_429 < MAX_RETRIES_429:
+                    retries_429 += 1
+                    logger.warning(
+                        "Zu viele Anfragen (429) für %s %s – warte %d s (Versuch %d/%d)",
+                        street, number, RETRY_AFTER_429_SECONDS, retries_429, MAX_RETRIES_429 + 1,
+                    )
+                    time.sleep(RETRY_AFTER_429_SECONDS)
+                else:
+                    logger.info("[%d/%d] Adresse %s %s -> Fehler %s", i + 1, len(lookups), street, number, e.response.status_code)
+                    break
+            except Exception as e:
+                logger.warning("Anfrage fehlgeschlagen für %s %s: %s", street, number, e)
+                break
+
+        if result is not None:
+            weekday, fixed_date, zip_code = result
+            upsert_address_lookup(street, number, weekday, fixed_date, zip_code)
+            ok += 1
+        else:
+            logger.info("[%d/%d] Adresse %s %s -> nicht aktualisiert", i + 1, len(lookups), street, number)
+
+        _delay_with_jitter()
+
+    if lookups:
+        logger.info("Gespeicherte Adressen geprüft: %d von %d aktualisiert", ok, len(lookups))
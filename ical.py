@@ -0,0 +1,213 @@
+"""
+iCalendar-Feeds (.ics) pro Stadtteil und pro Adresse.
+Feeds werden aus der lokalen Datenbank erzeugt (nie per FES-Anfrage) und pro
+Datenstand und Tag in der Tabelle ical_feed vorgehalten.
+"""
+import hashlib
+import logging
+from datetime import date, datetime, timedelta
+
+from config import (
+    ICAL_WEEKS_BACK,
+    ICAL_WEEKS_AHEAD,
+    ICAL_ADDRESS_RETENTION_DAYS,
+    ICAL_ADDRESS_ACTIVE_DAYS,
+    ICAL_ADDRESS_MAX_AGE_DAYS,
+)
+from models import (
+    WEEKDAY_NAMES,
+    get_schedule_by_stadtteil,
+    get_stadtteile_with_schedule,
+    get_address_lookup,
+    get_address_lookups,
+    touch_address_lookup,
+    get_unused_address_lookups,
+    delete_address_lookup,
+    get_ical_feed,
+    save_ical_feed,
+    delete_ical_feed,
+)
+
+logger = logging.getLogger(__name__)
+
+PRODID = "-//sperrmuell-fra//Sperrmuell-Termine Frankfurt//DE"
+EVENT_DESCRIPTION = "Sperrmüll ab 15:30 Uhr am Vortag rausstellen, Abholung ab 6:00 Uhr."
+
+
+def _escape(text):
+    return (
+        text.replace("\\", "\\\\")
+        .replace(";", "\\;")
+        .replace(",", "\\,")
+        .replace("\n", "\\n")
+    )
+
+
+def _fold(line):
+    """Zeilen nach RFC 5545 auf 75 Oktette umbrechen."""
+    raw = line.encode("utf-8")
+    if len(raw) <= 75:
+        return line
+    parts = []
+    limit = 75
+    while raw:
+        cut = min(limit, len(raw))
+        # Nicht mitten in einem UTF-8-Zeichen trennen
+        while cut < len(raw) and (raw[cut] & 0xC0) == 0x80:
+            cut -= 1
+        parts.append(raw[:cut].decode("utf-8"))
+        raw = raw[cut:]
+        limit = 74  # Folgezeilen beginnen mit einem Leerzeichen
+    return "\r\n ".join(parts)
+
+
+def _uid_slug(text):
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()[:12]
+
+
+def _dates_for(row, today):
+    """
+    Termine von ICAL_WEEKS_BACK Wochen vor bis ICAL_WEEKS_AHEAD Wochen nach heute, inklusive heute.
+    Vergangene Termine bleiben so im Kalender stehen, statt beim nächsten Abruf zu verschwinden.
+    """
+    start = today - timedelta(weeks=ICAL_WEEKS_BACK)
+    end = today + timedelta(weeks=ICAL_WEEKS_AHEAD)
+    if row.get("fixed_date"):
+        # Siedlungsabfuhr: alle 4 Wochen ab fixed_date, auch rückwärts
+        try:
+            d = date.fromisoformat(row["fixed_date"][:10])
+        except Exception:
+            return []
+        step = timedelta(days=28)
+        d += step * ((start - d).days // 28)
+        if d < start:
+            d += step
+    else:
+        step = timedelta(days=7)
+        d = start + timedelta(days=(row["weekday"] - start.weekday()) % 7)
+    result = []
+    while d <= end:
+        result.append(d)
+        d += step
+    return result
+
+
+def _data_version(rows):
+    """Fingerabdruck der Felder, aus denen ein Feed erzeugt wird."""
+    h = hashlib.sha1()
+    for r in sorted(rows, key=lambda r: (r["street"], r["housenumber"])):
+        h.update(f"{r['street']}|{r['housenumber']}|{r['weekday']}|{r.get('fixed_date') or ''}\n".encode("utf-8"))
+    return h.hexdigest()
+
+
+def build_calendar(name, key, rows, today):
+    """Erzeugt den .ics-Text für die gegebenen Einträge (ganztägige Termine)."""
+    stamp = today.strftime("%Y%m%dT000000Z")
+    lines = [
+        "BEGIN:VCALENDAR",
+        "VERSION:2.0",
+        f"PRODID:{PRODID}",
+        "CALSCALE:GREGORIAN",
+        "METHOD:PUBLISH",
+        f"X-WR-CALNAME:{_escape(f'Sperrmüll {name}')}",
+        "X-WR-TIMEZONE:Europe/Berlin",
+        "REFRESH-INTERVAL;VALUE=DURATION:P1D",
+        "X-PUBLISHED-TTL:P1D",
+    ]
+    seen = set()
+    for r in rows:
+        summary = "Siedlungsabfuhr" if r.get("fixed_date") else "Sperrmüll"
+        summary = f"{summary} {name}"
+        if len(rows) > 1:
+            # Mehrere Beispieladressen im Stadtteil: Termine unterscheidbar machen
+            summary = f"{summary} ({WEEKDAY_NAMES[r['weekday']]}, {r['street']})"
+        description = f"{EVENT_DESCRIPTION}\nBeispieladresse: {r['street']} {r['housenumber']}"
+        for d in _dates_for(r, today):
+            if (d, summary) in seen:
+                continue
+            seen.add((d, summary))
+            lines += [
+                "BEGIN:VEVENT",
+                f"UID:{d.strftime('%Y%m%d')}-{_uid_slug(key + summary)}@sperrmuell-fra",
+                f"DTSTAMP:{stamp}",
+                f"DTSTART;VALUE=DATE:{d.strftime('%Y%m%d')}",
+                f"DTEND;VALUE=DATE:{(d + timedelta(days=1)).strftime('%Y%m%d')}",
+                f"SUMMARY:{_escape(summary)}",
+                f"DESCRIPTION:{_escape(description)}",
+                "TRANSP:TRANSPARENT",
+                "END:VEVENT",
+            ]
+    lines.append("END:VCALENDAR")
+    return "\r\n".join(_fold(line) for line in lines) + "\r\n"
+
+
+def _get_or_build(key, name, rows):
+    """Liefert (body, etag) aus dem Cache oder erzeugt den Feed neu, falls Datenstand oder Tag sich geändert haben."""
+    today = date.today()
+    day = today.isoformat()
+    version = _data_version(rows)
+    cached = get_ical_feed(key)
+    if cached and cached["data_version"] == version and cached["day"] == day:
+        return cached["body"], cached["etag"]
+    body = build_calendar(name, key, rows, today)
+    etag = hashlib.sha1(body.encode("utf-8")).hexdigest()
+    save_ical_feed(key, version, day, etag, body)
+    return body, etag
+
+
+def get_stadtteil_feed(stadtteil):
+    """Feed für einen Stadtteil aus sperrmuell_schedule. None, wenn keine Daten vorliegen."""
+    rows = get_schedule_by_stadtteil(stadtteil=stadtteil)
+    if not rows:
+        return None
+    return _get_or_build(f"stadtteil:{stadtteil}", stadtteil, rows)
+
+
+def _address_feed_key(row):
+    return f"address:{row['address_key']}"
+
+
+def get_address_feed(street, housenumber):
+    """
+    Feed für eine Adresse aus einer gespeicherten Adress-Suche.
+    None, wenn die Adresse unbekannt ist oder ihr FES-Stand älter als ICAL_ADDRESS_MAX_AGE_DAYS ist.
+    """
+    row = get_address_lookup(street, housenumber)
+    if row is None:
+        return None
+    # Abruf auch bei veraltetem Stand vermerken, damit der Scrape-Job die Adresse wieder prüft
+    touch_address_lookup(row["address_key"], date.today().isoformat())
+    return _build_address_feed(row)
+
+
+def _build_address_feed(row):
+    max_age = timedelta(days=ICAL_ADDRESS_MAX_AGE_DAYS)
+    if datetime.fromisoformat(row["looked_up_at"]) < datetime.now() - max_age:
+        return None
+    name = f"{row['street']} {row['housenumber']}"
+    return _get_or_build(_address_feed_key(row), name, [row])
+
+
+def prune_address_lookups():
+    """Adressen ohne Feed-Abruf seit ICAL_ADDRESS_RETENTION_DAYS samt Feed löschen."""
+    before = (date.today() - timedelta(days=ICAL_ADDRESS_RETENTION_DAYS)).isoformat()
+    rows = get_unused_address_lookups(before)
+    for row in rows:
+        delete_address_lookup(row["address_key"])
+        delete_ical_feed(_address_feed_key(row))
+    if rows:
+        logger.info("Gespeicherte Adressen gelöscht: %d", len(rows))
+
+
+def refresh_feeds():
+    """Feeds vorab erzeugen; unveränderte Feeds (gleicher Datenstand und Tag) werden übersprungen."""
+    prune_address_lookups()
+    count = 0
+    for stadtteil in get_stadtteile_with_schedule():
+        if get_stadtteil_feed(stadtteil) is not None:
+            count += 1
+    polled_since = (date.today() - timedelta(days=ICAL_ADDRESS_ACTIVE_DAYS)).isoformat()
+    for row in get_address_lookups(polled_since=polled_since):
+        if _build_address_feed(row) is not None:
+            count += 1
+    logger.info("iCal-Feeds aktualisiert: %d", count)
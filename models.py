@@ -46,6 +46,24 @@ def init_db():
         );
         CREATE INDEX IF NOT EXISTS idx_schedule_stadtteil ON sperrmuell_schedule(stadtteil);
         CREATE INDEX IF NOT EXISTS idx_schedule_weekday ON sperrmuell_schedule(weekday);
+        CREATE TABLE IF NOT EXISTS address_lookup (
+            address_key TEXT PRIMARY KEY,
+            street TEXT NOT NULL,
+            housenumber TEXT NOT NULL,
+            weekday INTEGER NOT NULL,
+            fixed_date TEXT,
+            zip_code TEXT,
+            looked_up_at TEXT NOT NULL,
+            last_polled_at TEXT
+        );
+        CREATE TABLE IF NOT EXISTS ical_feed (
+            feed_key TEXT PRIMARY KEY,
+            data_version TEXT NOT NULL,
+            day TEXT NOT NULL,
+            etag TEXT NOT NULL,
+            body TEXT NOT NULL,
+            generated_at TEXT NOT NULL
+        );
     """)
     conn.commit()
     conn.close()
@@ -76,6 +94,122 @@ def upsert_schedule(stadtteil, street, housenumber, weekday, fixed_date=None, zi
     conn.close()
 
 
+def address_key(street, housenumber):
+    """Schreibweisen-unabhängiger Schlüssel einer Adresse (auch für Umlaute)."""
+    return f"{street.strip().casefold()}|{housenumber.strip().casefold()}"
+
+
+def upsert_address_lookup(street, housenumber, weekday, fixed_date=None, zip_code=None):
+    """Ergebnis einer Adress-Suche merken – Grundlage für den Adress-Kalender."""
+    conn = get_db()
+    conn.execute(
+        """INSERT INTO address_lookup
+           (address_key, street, housenumber, weekday, fixed_date, zip_code, looked_up_at)
+           VALUES (?, ?, ?, ?, ?, ?, ?)
+           ON CONFLICT(address_key) DO UPDATE SET
+             street = excluded.street,
+             housenumber = excluded.housenumber,
+             weekday = excluded.weekday,
+             fixed_date = excluded.fixed_date,
+             zip_code = excluded.zip_code,
+             looked_up_at = excluded.looked_up_at""",
+        (address_key(street, housenumber), street, housenumber, weekday, fixed_date, zip_code,
+         datetime.now().isoformat()),
+    )
+    conn.commit()
+    conn.close()
+
+
+def get_address_lookup(street, housenumber):
+    conn = get_db()
+    row = conn.execute(
+        "SELECT * FROM address_lookup WHERE address_key = ?",
+        (address_key(street, housenumber),),
+    ).fetchone()
+    conn.close()
+    return dict(row) if row else None
+
+
+def get_address_lookups(polled_since=None):
+    """Gespeicherte Adressen; mit polled_since nur solche, deren Feed seitdem abgerufen wurde."""
+    conn = get_db()
+    if polled_since:
+        rows = conn.execute(
+            """SELECT * FROM address_lookup
+               WHERE last_polled_at >= ?
+               ORDER BY street, housenumber""",
+            (polled_since,),
+        ).fetchall()
+    else:
+        rows = conn.execute("SELECT * FROM address_lookup ORDER BY street, housenumber").fetchall()
+    conn.close()
+    return [dict(r) for r in rows]
+
+
+def touch_address_lookup(key, day):
+    """Feed-Abruf vermerken – höchstens ein Schreibzugriff pro Adresse und Tag."""
+    conn = get_db()
+    conn.execute(
+        """UPDATE address_lookup SET last_polled_at = ?
+           WHERE address_key = ?
+           AND (last_polled_at IS NULL OR last_polled_at < ?)""",
+        (day, key, day),
+    )
+    conn.commit()
+    conn.close()
+
+
+def get_unused_address_lookups(before):
+    """Adressen, deren Feed seit before weder abgerufen noch neu gesucht wurde."""
+    conn = get_db()
+    rows = conn.execute(
+        """SELECT * FROM address_lookup
+           WHERE COALESCE(last_polled_at, looked_up_at) < ?
+           AND looked_up_at < ?""",
+        (before, before),
+    ).fetchall()
+    conn.close()
+    return [dict(r) for r in rows]
+
+
+def delete_address_lookup(key):
+    conn = get_db()
+    conn.execute("DELETE FROM address_lookup WHERE address_key = ?", (key,))
+    conn.commit()
+    conn.close()
+
+
+def get_ical_feed(feed_key):
+    conn = get_db()
+    row = conn.execute("SELECT * FROM ical_feed WHERE feed_key = ?", (feed_key,)).fetchone()
+    conn.close()
+    return dict(row) if row else None
+
+
+def delete_ical_feed(feed_key):
+    conn = get_db()
+    conn.execute("DELETE FROM ical_feed WHERE feed_key = ?", (feed_key,))
+    conn.commit()
+    conn.close()
+
+
+def save_ical_feed(feed_key, data_version, day, etag, body):
+    conn = get_db()
+    conn.execute(
+        """INSERT INTO ical_feed (feed_key, data_version, day, etag, body, generated_at)
+           VALUES (?, ?, ?, ?, ?, ?)
+           ON CONFLICT(feed_key) DO UPDATE SET
+             data_version = excluded.data_version,
+             day = excluded.day,
+             etag = excluded.etag,
+             body = excluded.body,
+             generated_at = excluded.generated_at""",
+        (feed_key, data_version, day, etag, body, datetime.now().isoformat()),
+    )
+    conn.commit()
+    conn.close()
+
+
 def get_schedule_by_stadtteil(stadtteil=None):
     conn = get_db()
     if stadtteil: